@@ -1,16 +1,16 @@
 # app.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, date, timedelta
 import os
 import shutil
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors as rlcolors
-from reportlab.lib.styles import getSampleStyleSheet
 from dateutil.relativedelta import relativedelta
+import re
 import threading
 import time
 import functools
+from collections import defaultdict
 
 # Global lock for loan status updates
 loan_status_lock = threading.Lock()
@@ -58,11 +58,23 @@ def cleanup_orphaned_profiles():
 supabase_client = init_supabase()
 supabase_service = init_supabase_service()
 
+# Table handles bound once - every .table(...) call allocates a fresh
+# request builder, so the hot-path tables reuse one handle each. The
+# handles share the client's postgrest session, so tokens applied by
+# get_authenticated_client() still cover queries built from them.
+if supabase_client:
+    LOANS_TBL = supabase_client.table("loans_new")
+    INTEREST_TBL = supabase_client.table("loan_interest_history")
+    PAYMENTS_TBL = supabase_client.table("payments_new")
+else:
+    LOANS_TBL = INTEREST_TBL = PAYMENTS_TBL = None
+
 
 
 # ---------- CONFIG ----------
 BACKUP_DIR = "backups"
 INTEREST_RATE = 0.40  # 40% interest rate
+_ONE_MONTH = relativedelta(months=1)  # reused instead of rebuilding per loop iteration
 
 st.set_page_config(page_title="💼 Loan Management System", layout="wide")
 
@@ -86,11 +98,12 @@ def format_money(v):
         v = round(float(v), 2)
     except Exception:
         return v
+    # format whole amounts without decimals, halves with one - no
+    # rstrip re-scans of the formatted string
+    if v == int(v):
+        return f"{int(v)}"
     s = f"{v:.2f}"
-    # remove trailing zeros and decimal if not needed
-    if "." in s:
-        s = s.rstrip("0").rstrip(".")
-    return s
+    return s[:-1] if s.endswith("0") else s
 
 def hash_pw(pw: str) -> str:
     """Legacy function kept for compatibility - Supabase now handles auth"""
@@ -111,6 +124,9 @@ def colored_money(label, value):
     else:
         return f"R {value:.2f}"
 
+# Strips the status emojis added by status_color in one scan
+_STATUS_EMOJI_RE = re.compile("[🟢🟡🔴]")
+
 def status_color(status):
     """Returns colored status string - from STRUCTURE PLAN"""
     if status == "Paid":
@@ -194,46 +210,54 @@ def cached_get_table_data(table_name, filters=None, order_by=None, limit=None):
         return []
 
 @timer_decorator
-@st.cache_data(ttl=180)  # Cache for 3 minutes - shorter TTL for frequently changing data
-def cached_get_loans_simple_view():
+@st.cache_data(ttl=60, show_spinner=False)  # Short TTL - writes clear it explicitly anyway
+def cached_get_loans_simple_view(client_name=None, group_name=None):
     """Cached version of get_loans_simple_view - this is the most expensive query"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        loans_data = client.table("loans_new").select("*, clients(name, groups(name))").execute()
-        
-        results = []
-        for loan in loans_data.data:
-            loan_id = loan["id"]
-            client_name = loan["clients"]["name"] if loan.get("clients") else ""
-            group_name = loan["clients"]["groups"]["name"] if loan.get("clients") and loan["clients"].get("groups") else ""
-            
-            # Calculate interest
-            interest_data = client.table("loan_interest_history").select("interest_amount").eq("loan_id", loan_id).eq("is_paid", 0).execute()
-            interest = sum(item["interest_amount"] for item in interest_data.data)
-            
-            # Calculate paid amount
-            payments_data = client.table("payments_new").select("amount").eq("loan_id", loan_id).execute()
-            paid = sum(item["amount"] for item in payments_data.data)
-            
-            total = loan["current_principal"] + interest
-            
-            results.append({
-                "id": loan_id,
-                "client": client_name,
-                "group_name": group_name,
-                "loan_date": loan["loan_date"],
-                "due_date": loan["current_due_date"],
-                "principal": loan["current_principal"],
-                "interest": interest,
-                "paid": paid,
-                "total": total,
-                "status": loan["status"]
-            })
-        
-        return results
+        # The loans_dashboard view joins clients/groups and sums unpaid
+        # interest and payments server-side - one round-trip instead of
+        # a loans query plus two batch aggregate queries
+        query = client.table("loans_dashboard").select(
+            "id, client, group_name, loan_date, due_date, principal, interest, paid, status"
+        )
+        # Optional equality filters run as index scans in Postgres, so a
+        # single-client or single-group fetch doesn't pull the whole book
+        if client_name:
+            query = query.eq("client", client_name)
+        if group_name:
+            query = query.eq("group_name", group_name)
+        loans_data = query.execute()
+
+        rows = loans_data.data
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows)
+        df["total"] = df["principal"] + df["interest"]
+
+        # High-repetition string columns as categoricals - equality
+        # filters then compare integer codes instead of Python strings
+        # and the cached frame is several times smaller
+        df["group_name"] = df["group_name"].astype("category")
+        df["status"] = df["status"].astype("category")
+
+        # Prebuilt lowercase client names so the substring search doesn't
+        # re-lowercase the whole column on every keystroke
+        df["_client_lc"] = df["client"].str.lower()
+
+        # Typed due dates parsed once at ingest - the date search then
+        # compares day-resolution integers instead of Python strings -
+        # and the Monthly view's month label precomputed the same way
+        df["due_date_dt"] = pd.to_datetime(df["due_date"]).values.astype("datetime64[D]")
+        df["month"] = pd.to_datetime(df["loan_date"]).dt.strftime("%B %Y")
+
+        return df[["id", "client", "group_name", "loan_date", "due_date",
+                   "principal", "interest", "paid", "total", "status",
+                   "_client_lc", "due_date_dt", "month"]]
     except Exception as e:
         st.error(f"Error getting loans view: {e}")
-        return []
+        return pd.DataFrame()
 
 @timer_decorator
 @st.cache_data(ttl=300)  # Cache for 5 minutes
@@ -241,18 +265,28 @@ def cached_get_payments_simple_view(limit=20):
     """Cached version of get_payments_simple_view"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        payments_data = client.table("payments_new").select("*, loans_new(*, clients(*, groups(*)))").order("payment_date", desc=True).limit(limit).execute()
-        
+        # Only the columns the view surfaces - the wildcard nested select
+        # dragged every loan/client/group column across the wire
+        payments_data = PAYMENTS_TBL.select(
+            "amount, payment_date, loans_new(id, loan_date, current_due_date, current_principal, status, clients(name, groups(name)))"
+        ).order("payment_date", desc=True).limit(limit).execute()
+
+        # Batch-fetch unpaid interest for all loans referenced by these payments
+        # in one query instead of one per payment (N+1 pattern)
+        loan_ids = list({payment.get("loans_new", {}).get("id") for payment in payments_data.data if payment.get("loans_new")})
+        interest_by_loan = defaultdict(float)
+        if loan_ids:
+            interest_data = INTEREST_TBL.select("loan_id, interest_amount").in_("loan_id", loan_ids).eq("is_paid", 0).execute()
+            for item in interest_data.data:
+                interest_by_loan[item["loan_id"]] += item["interest_amount"]
+
         results = []
         for payment in payments_data.data:
             loan = payment.get("loans_new", {})
             client_data = loan.get("clients", {})
             group = client_data.get("groups", {})
-            
-            # Calculate interest for this loan
-            interest_data = client.table("loan_interest_history").select("interest_amount").eq("loan_id", loan.get("id")).eq("is_paid", 0).execute()
-            interest = sum(item["interest_amount"] for item in interest_data.data)
-            
+
+            interest = interest_by_loan[loan.get("id")]
             total = loan.get("current_principal", 0) + interest
             
             results.append({
@@ -274,15 +308,11 @@ def cached_get_payments_simple_view(limit=20):
         return []
 
 @timer_decorator
-@st.cache_data(ttl=600)  # Cache for 10 minutes - settings don't change often
-def cached_get_setting(key):
-    """Cached version of get_setting"""
+@st.cache_data(ttl=600, show_spinner=False)  # Cache for 10 minutes - settings don't change often
+def cached_get_setting(user_id, key):
+    """Cached version of get_setting - keyed by (user_id, key) so entries
+    are never shared across accounts"""
     try:
-        user_id = get_current_user_id()
-        # If no user is logged in (login page), don't query settings
-        if not user_id:
-            return None
-        
         client = get_authenticated_client()  # Use authenticated client
         response = client.table("settings").select("value").eq("key", key).eq("user_id", user_id).execute()
         if response.data:
@@ -311,6 +341,47 @@ def get_table_data(table_name, filters=None, order_by=None, limit=None):
     """Get data from Supabase table with user isolation - uses cached version"""
     return cached_get_table_data(table_name, filters, order_by, limit)
 
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_client_names(user_id):
+    """Plain list of client names for selectboxes - no DataFrame detour.
+    Keyed by user_id so entries are never shared across accounts"""
+    data = get_table_data("clients", order_by="name")
+    return [row["name"] for row in data] if data else []
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_group_names(user_id):
+    """Plain list of group names for selectboxes - no DataFrame detour.
+    Keyed by user_id so entries are never shared across accounts"""
+    data = get_table_data("groups", order_by="name")
+    return [row["name"] for row in data] if data else []
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_client_choices(user_id, placeholder):
+    """Selectbox options tuple with the placeholder prepended - a stable
+    tuple lets Streamlit diff the widget options without a rebuild"""
+    return (placeholder, *cached_client_names(user_id))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_group_choices(user_id, placeholder):
+    """Selectbox options tuple with the placeholder prepended"""
+    return (placeholder, *cached_group_names(user_id))
+
+def _invalidate_table_caches(table_name):
+    """Clear only the caches a write to table_name can leave stale.
+
+    Loan/payment/interest writes no longer drop the cached groups and
+    clients lists that back the selectboxes on every page."""
+    if table_name in ("groups", "clients"):
+        cached_get_table_data.clear()
+        cached_client_names.clear()
+        cached_group_names.clear()
+        cached_client_choices.clear()
+        cached_group_choices.clear()
+    # The simple views join loans, payments, interest, clients and groups,
+    # so any of these writes can change what they show
+    cached_get_loans_simple_view.clear()
+    cached_get_payments_simple_view.clear()
+
 def insert_table_data(table_name, data):
     """Insert data into Supabase table with user isolation"""
     try:
@@ -324,12 +395,8 @@ def insert_table_data(table_name, data):
         response = client.table(table_name).insert(data_with_user).execute()
         
         # Clear relevant caches after insert
-        if table_name == "loans_new":
-            st.cache_data.clear()  # Clear all data caches
-        elif table_name in ["clients", "groups", "payments_new", "loan_interest_history"]:
-            # Clear specific caches
-            st.cache_data.clear()
-        
+        _invalidate_table_caches(table_name)
+
         return response.data[0] if response.data else None
     except Exception as e:
         st.error(f"Error inserting into {table_name}: {e}")
@@ -346,8 +413,8 @@ def update_table_data(table_name, id_value, data):
         response = client.table(table_name).update(data).eq("id", id_value).eq("user_id", user_id).execute()
         
         # Clear caches after update
-        st.cache_data.clear()
-        
+        _invalidate_table_caches(table_name)
+
         return response.data[0] if response.data else None
     except Exception as e:
         st.error(f"Error updating {table_name}: {e}")
@@ -364,8 +431,8 @@ def delete_table_data(table_name, id_value):
         response = client.table(table_name).delete().eq("id", id_value).eq("user_id", user_id).execute()
         
         # Clear caches after delete
-        st.cache_data.clear()
-        
+        _invalidate_table_caches(table_name)
+
         return True
     except Exception as e:
         st.error(f"Error deleting from {table_name}: {e}")
@@ -373,7 +440,11 @@ def delete_table_data(table_name, id_value):
 
 def get_setting(key):
     """Get setting from Supabase with user isolation - uses cached version"""
-    return cached_get_setting(key)
+    user_id = get_current_user_id()
+    # If no user is logged in (login page), don't query settings
+    if not user_id:
+        return None
+    return cached_get_setting(user_id, key)
 
 def set_setting(key, value):
     """Set setting in Supabase with user isolation"""
@@ -383,17 +454,21 @@ def set_setting(key, value):
             return False
         
         client = get_authenticated_client()  # Use authenticated client
-        
-        # Check if setting exists
-        existing = get_setting(key)
-        if existing:
-            client.table("settings").update({"value": value}).eq("key", key).eq("user_id", user_id).execute()
-        else:
-            client.table("settings").insert({"key": key, "value": value, "user_id": user_id}).execute()
-        
-        # Clear settings cache
-        st.cache_data.clear()
-        
+
+        # Single atomic upsert instead of a SELECT followed by
+        # INSERT-or-UPDATE (two round trips and a race window)
+        client.table("settings").upsert(
+            {"key": key, "value": value, "user_id": user_id},
+            on_conflict="user_id,key"
+        ).execute()
+
+        # Clear only the settings cache, not every cached query
+        cached_get_setting.clear()
+
+        # Keep the per-session copy of the business name current
+        if key == "business_name":
+            st.session_state.business_name = value
+
         return True
     except Exception as e:
         st.error(f"Error setting {key}: {e}")
@@ -407,6 +482,21 @@ def safe_update_loan_statuses():
         return update_loan_statuses()
     return False
 
+def maybe_update_loan_statuses():
+    """Run the status update at most once per minute per session, or
+    immediately when a mutation has set the statuses_dirty flag.
+
+    The pages call this on every rerun (each keystroke in a form), so
+    without the gate every interaction fired a bulk write to Supabase."""
+    now = time.monotonic()
+    if (st.session_state.get("statuses_dirty", False)
+            or now - st.session_state.get("statuses_refreshed_at", 0.0) > 60):
+        changed = safe_update_loan_statuses()
+        st.session_state.statuses_dirty = False
+        st.session_state.statuses_refreshed_at = now
+        return changed
+    return False
+
 def calculate_interest(principal):
     """Calculate 40% interest on principal"""
     return round(principal * INTEREST_RATE, 2)
@@ -416,37 +506,9 @@ def get_next_due_date(current_due_date_str):
     if not current_due_date_str:
         return None
     current_due_date = date.fromisoformat(current_due_date_str)
-    next_due_date = current_due_date + relativedelta(months=1)
+    next_due_date = current_due_date + _ONE_MONTH
     return next_due_date.isoformat()
 
-@timer_decorator
-def calculate_total_owed(loan_id):
-    """Calculate total amount owed for a loan (principal + unpaid interest) with user isolation"""
-    try:
-        user_id = get_current_user_id()
-        if not user_id:
-            return 0, 0, 0
-        
-        # Get loan info with user isolation
-        client = get_authenticated_client()  # Use authenticated client
-        loans = client.table("loans_new").select("*").eq("id", loan_id).eq("user_id", user_id).execute()
-        if not loans.data:
-            return 0, 0, 0
-        
-        loan = loans.data[0]
-        current_principal = loan["current_principal"]
-        
-        # Get unpaid interest for this loan (user isolation handled by RLS)
-        interest_data = client.table("loan_interest_history").select("interest_amount").eq("loan_id", loan_id).eq("is_paid", 0).execute()
-        
-        unpaid_interest = sum(item["interest_amount"] for item in interest_data.data if item["interest_amount"] > 0)
-        total_owed = round(current_principal + unpaid_interest, 2)
-        
-        return total_owed, current_principal, unpaid_interest
-    except Exception as e:
-        st.error(f"Error calculating total owed: {e}")
-        return 0, 0, 0
-
 # ---------- CORE LOGIC ----------
 def calculate_interest(principal):
     """Calculate 40% interest on principal"""
@@ -457,31 +519,31 @@ def get_next_due_date(current_due_date_str):
     if not current_due_date_str:
         return None
     current_due_date = date.fromisoformat(current_due_date_str)
-    next_due_date = current_due_date + relativedelta(months=1)
+    next_due_date = current_due_date + _ONE_MONTH
     return next_due_date.isoformat()
 
-def calculate_total_owed(loan_id):
-    """Calculate total amount owed for a loan (principal + unpaid interest)"""
+@timer_decorator
+def get_loan_totals():
+    """Get (total_owed, principal, unpaid_interest) for every loan of the
+    current user via a single loan_totals RPC instead of two queries per loan.
+
+    Returns None when the RPC fails so callers can tell "totals
+    unavailable" apart from "user has no loans" ({})."""
     try:
-        # Get loan info
-        loans = get_table_data("loans_new", {"id": loan_id})
-        if not loans:
-            return 0, 0, 0
-        
-        loan = loans[0]
-        current_principal = loan["current_principal"]
-        
-        # Get unpaid interest
+        user_id = get_current_user_id()
+        if not user_id:
+            return None
+
         client = get_authenticated_client()  # Use authenticated client
-        interest_data = client.table("loan_interest_history").select("interest_amount").eq("loan_id", loan_id).eq("is_paid", 0).execute()
-        
-        unpaid_interest = sum(item["interest_amount"] for item in interest_data.data if item["interest_amount"] > 0)
-        total_owed = round(current_principal + unpaid_interest, 2)
-        
-        return total_owed, current_principal, unpaid_interest
+        response = client.rpc("loan_totals").execute()
+
+        return {
+            row["loan_id"]: (row["total_owed"], row["current_principal"], row["unpaid_interest"])
+            for row in response.data
+        }
     except Exception as e:
-        st.error(f"Error calculating total owed: {e}")
-        return 0, 0, 0
+        st.error(f"Error calculating loan totals: {e}")
+        return None
 
 @timer_decorator
 def process_payment(loan_id, payment_amount, payment_date):
@@ -492,100 +554,24 @@ def process_payment(loan_id, payment_amount, payment_date):
         if not user_id:
             return False, "User not authenticated"
 
-        # ---------------- GET LOAN (USER-SCOPED) ----------------
+        # ---------------- APPLY PAYMENT (SINGLE RPC) ----------------
+        # The whole interest-first waterfall runs inside one apply_payment()
+        # transaction (see supabase/migrations): interest entries, principal,
+        # payment record and status in a single round trip, so a failure can
+        # no longer leave interest half-marked as paid.
         client = get_authenticated_client()  # Use authenticated client
-        loans = (
-            client
-            .table("loans_new")
-            .select("*")
-            .eq("id", loan_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
-
-        if not loans.data:
-            return False, "Loan not found or access denied"
-
-        loan = loans.data[0]
-        current_principal = float(loan["current_principal"])
-
-        # ---------------- GET UNPAID INTEREST ----------------
-        interest_data = (
-            client
-            .table("loan_interest_history")
-            .select("*")
-            .eq("loan_id", loan_id)
-            .eq("user_id", user_id)
-            .eq("is_paid", 0)
-            .gt("interest_amount", 0)
-            .order("due_date")
-            .execute()
-        )
-
-        remaining_payment = round(float(payment_amount), 2)
-        applied_to_interest = 0.0
-        applied_to_principal = 0.0
-
-        # ---------------- PAY INTEREST FIRST ----------------
-        for entry in interest_data.data:
-            if remaining_payment <= 0:
-                break
-
-            entry_id = entry["id"]
-            interest_amount = float(entry["interest_amount"])
-
-            if remaining_payment >= interest_amount:
-                # Fully pay interest
-                client.table("loan_interest_history").update({
-                    "is_paid": 1
-                }).eq("id", entry_id).eq("user_id", user_id).execute()
-
-                applied_to_interest += interest_amount
-                remaining_payment = round(remaining_payment - interest_amount, 2)
-            else:
-                # Partial interest payment
-                new_interest_amount = round(interest_amount - remaining_payment, 2)
-
-                client.table("loan_interest_history").update({
-                    "interest_amount": new_interest_amount
-                }).eq("id", entry_id).eq("user_id", user_id).execute()
-
-                applied_to_interest += remaining_payment
-                remaining_payment = 0
-
-        # ---------------- APPLY TO PRINCIPAL ----------------
-        if remaining_payment > 0:
-            applied_to_principal = remaining_payment
-            new_principal = round(current_principal - applied_to_principal, 2)
-            new_principal = max(new_principal, 0)
-
-            client.table("loans_new").update({
-                "current_principal": new_principal
-            }).eq("id", loan_id).eq("user_id", user_id).execute()
-
-        # ---------------- RECORD PAYMENT (CRITICAL FIX) ----------------
-        client.table("payments_new").insert({
-            "loan_id": loan_id,
-            "amount": payment_amount,
-            "payment_date": payment_date.isoformat(),
-            "applied_to_interest": applied_to_interest,
-            "applied_to_principal": applied_to_principal,
-            "remaining_amount": remaining_payment,
-            "user_id": user_id  # ✅ REQUIRED
+        client.rpc("apply_payment", {
+            "p_loan_id": loan_id,
+            "p_amount": round(float(payment_amount), 2),
+            "p_date": payment_date.isoformat()
         }).execute()
 
-        # ---------------- UPDATE LOAN STATUS ----------------
-        total_owed, _, _ = calculate_total_owed(loan_id)
-
-        new_status = "Paid" if total_owed <= 0 else "Active"
+        # Clear caches after payment
+        _invalidate_table_caches("payments_new")
 
-        client.table("loans_new").update({
-            "status": new_status
-        }).eq("id", loan_id).eq("user_id", user_id).execute()
+        # Statuses may have changed - let the next gated update run now
+        st.session_state.statuses_dirty = True
 
-        # Clear caches after payment
-        st.cache_data.clear()
-        
         return True, "Payment processed successfully"
 
     except Exception as e:
@@ -607,58 +593,90 @@ def check_and_add_overdue_interest():
             # Get active loans for current user only
             client = get_authenticated_client()  # Use authenticated client
             loans_data = (
-                client
-                .table("loans_new")
-                .select("*")
+                LOANS_TBL
+                .select("id, user_id, current_principal, current_due_date")
                 .eq("user_id", user_id)
                 .neq("status", "Paid")
                 .execute()
             )
             
-            for loan in loans_data.data:
+            loan_ids = [loan["id"] for loan in loans_data.data]
+            if not loan_ids:
+                return True
+
+            # Fetch every existing (loan_id, due_date) pair once so the
+            # per-month existence check below is a local set lookup
+            # instead of a SELECT per missed month
+            existing = (
+                INTEREST_TBL
+                .select("loan_id, due_date")
+                .in_("loan_id", loan_ids)
+                .execute()
+            )
+            seen = {(row["loan_id"], row["due_date"]) for row in existing.data}
+
+            # Interest is a flat rate on the current principal, so compute it
+            # for the whole batch in one numpy pass instead of once per
+            # loan per missed month
+            principals = np.fromiter(
+                (loan["current_principal"] for loan in loans_data.data),
+                dtype=np.float64, count=len(loans_data.data)
+            )
+            interests = np.round(principals * INTEREST_RATE, 2)
+
+            interest_to_insert = []
+            loan_updates = []
+            today_iso = today.isoformat()
+
+            for idx, loan in enumerate(loans_data.data):
                 loan_id = loan["id"]
                 current_principal = loan["current_principal"]
                 current_due_date_str = loan.get("current_due_date")
-                
+
                 if not current_due_date_str:
                     continue
-                
+
                 current_due_date = date.fromisoformat(current_due_date_str)
-                
+                interest_amount = float(interests[idx])
+
                 # Loop through ALL missed months
                 while today > current_due_date:
-                    # Check if interest already exists for this due date
-                    existing_interest = (
-                        client
-                        .table("loan_interest_history")
-                        .select("*")
-                        .eq("loan_id", loan_id)
-                        .eq("due_date", current_due_date.isoformat())
-                        .execute()
-                    )
-                    
-                    if not existing_interest.data:
-                        interest_amount = calculate_interest(current_principal)
-                        
-                        client.table("loan_interest_history").insert({
+                    # Serialize the month step once; the same string serves
+                    # the existence check and the insert payload
+                    current_iso = current_due_date.isoformat()
+                    if (loan_id, current_iso) not in seen:
+                        interest_to_insert.append({
                             "loan_id": loan_id,
-                            "due_date": current_due_date.isoformat(),
+                            "due_date": current_iso,
                             "interest_amount": interest_amount,
                             "principal_at_time": current_principal,
-                            "added_date": today.isoformat(),
+                            "added_date": today_iso,
                             "is_paid": 0,
                             "user_id": user_id  # Ensure user_id is set
-                        }).execute()
-                    
+                        })
+
                     # Move to next due date
-                    current_due_date = current_due_date + relativedelta(months=1)
-                
-                # Update the loan's current due date and status
-                client.table("loans_new").update({
+                    current_due_date = current_due_date + _ONE_MONTH
+
+                # Update the loan's current due date and status. Send only
+                # the changed columns - resending the whole fetched row
+                # would overwrite columns (e.g. current_principal) that a
+                # concurrent apply_payment may have moved since the fetch
+                loan_updates.append({
+                    "id": loan_id,
+                    "user_id": user_id,
                     "current_due_date": current_due_date.isoformat(),
                     "status": "Overdue"
-                }).eq("id", loan_id).execute()
-            
+                })
+
+            # One bulk insert for all missed-month interest and one bulk
+            # upsert for the advanced due dates
+            if interest_to_insert:
+                INTEREST_TBL.insert(interest_to_insert).execute()
+
+            if loan_updates:
+                LOANS_TBL.upsert(loan_updates, on_conflict="id").execute()
+
             return True
         except Exception as e:
             # Suppress "temporarily unavailable" errors
@@ -695,12 +713,21 @@ def update_loan_statuses():
         
         # Get all loans for current user only
         client = get_authenticated_client()  # Use authenticated client
-        loans_data = client.table("loans_new").select("*").eq("user_id", user_id).execute()
-        
+        loans_data = LOANS_TBL.select("id, user_id, status, current_due_date").eq("user_id", user_id).execute()
+
+        # One RPC for all loan balances instead of two queries per loan.
+        # If the RPC failed, abort rather than treating every loan's
+        # missing total as zero - that would flip the whole book to Paid
+        # in one bulk upsert on a single transient error
+        totals = get_loan_totals()
+        if totals is None:
+            return False
+
+        status_updates = []
         for loan in loans_data.data:
             loan_id = loan["id"]
-            total_owed, current_principal, unpaid_interest = calculate_total_owed(loan_id)
-            
+            total_owed, current_principal, unpaid_interest = totals.get(loan_id, (0, 0, 0))
+
             if total_owed <= 0:
                 status = "Paid"
             else:
@@ -713,10 +740,25 @@ def update_loan_statuses():
                         status = "Partial"
                 else:
                     status = "Partial"
-            
-            client.table("loans_new").update({"status": status}).eq("id", loan_id).eq("user_id", user_id).execute()
-        
-        return True
+
+            # Skip loans whose status is already right - on a stable book
+            # this leaves nothing to write at all
+            if status == loan.get("status"):
+                continue
+
+            # Send only the key and the changed column - every id here was
+            # just fetched, so the upsert takes its DO UPDATE path and a
+            # full stale row would clobber concurrent payment writes
+            status_updates.append({"id": loan_id, "user_id": user_id, "status": status})
+
+        # Write all statuses in one bulk upsert instead of one UPDATE per loan
+        if status_updates:
+            LOANS_TBL.upsert(status_updates, on_conflict="id").execute()
+            cached_get_loans_simple_view.clear()
+
+        # True only when rows actually changed, so callers know whether
+        # their already-fetched loans data went stale
+        return bool(status_updates)
     except Exception as e:
         # Only show error if it's not a NoneType or resource issue
         error_msg = str(e)
@@ -733,13 +775,17 @@ def update_loan_statuses():
             pass
 
 
-# Run status updates on start
-safe_update_loan_statuses()
+# Run status updates on start - at most once per session per day, since
+# Streamlit re-executes the whole script on every widget interaction
+if st.session_state.get("last_status_update") != date.today().isoformat():
+    if "auth_session" in st.session_state and st.session_state.auth_session:
+        safe_update_loan_statuses()
+        st.session_state["last_status_update"] = date.today().isoformat()
 
 # ---------- VIEW FUNCTIONS ----------
-def get_loans_simple_view():
-    """Get loans data in the simple view format - uses cached version"""
-    return cached_get_loans_simple_view()
+def get_loans_simple_view(client_name=None, group_name=None):
+    """Get the loans view as a DataFrame - uses cached version"""
+    return cached_get_loans_simple_view(client_name, group_name)
 
 def get_payments_simple_view(limit=20):
     """Get payments data in the simple view format - uses cached version"""
@@ -751,8 +797,9 @@ def can_delete_client(client_id):
     """Check if client can be deleted (no related loans)"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        loans_data = client.table("loans_new").select("id").eq("client_id", client_id).execute()
-        return len(loans_data.data) == 0
+        # head=True asks PostgREST for the count only - no rows travel the wire
+        response = LOANS_TBL.select("id", count="exact", head=True).eq("client_id", client_id).execute()
+        return response.count == 0
     except Exception as e:
         st.error(f"Error checking client deletion: {e}")
         return False
@@ -762,8 +809,8 @@ def can_delete_group(group_id):
     """Check if group can be deleted (no related clients)"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        clients_data = client.table("clients").select("id").eq("group_id", group_id).execute()
-        return len(clients_data.data) == 0
+        response = client.table("clients").select("id", count="exact", head=True).eq("group_id", group_id).execute()
+        return response.count == 0
     except Exception as e:
         st.error(f"Error checking group deletion: {e}")
         return False
@@ -773,24 +820,13 @@ def delete_client_with_related_data(client_id):
     """Delete client and all related data"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        # Get all loan IDs for this client
-        loans_data = client.table("loans_new").select("id").eq("client_id", client_id).execute()
-        
-        # Delete related payments and interest history for each loan
-        for loan in loans_data.data:
-            loan_id = loan["id"]
-            client.table("payments_new").delete().eq("loan_id", loan_id).execute()
-            client.table("loan_interest_history").delete().eq("loan_id", loan_id).execute()
-        
-        # Delete loans
-        client.table("loans_new").delete().eq("client_id", client_id).execute()
-        
-        # Delete client
+        # Loans, payments and interest history cascade from the client
+        # delete via ON DELETE CASCADE foreign keys (see supabase/migrations)
         client.table("clients").delete().eq("id", client_id).execute()
-        
-        # Clear all caches
-        st.cache_data.clear()
-        
+
+        # Clear clients list and loan/payment views
+        _invalidate_table_caches("clients")
+
         return True, "Client and all related data deleted successfully"
     except Exception as e:
         return False, f"Error deleting client: {str(e)}"
@@ -800,21 +836,13 @@ def delete_group_with_related_data(group_id):
     """Delete group and all related data"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        # Get all client IDs in this group
-        clients_data = client.table("clients").select("id").eq("group_id", group_id).execute()
-        
-        # Delete each client and their related data
-        for client_data in clients_data.data:
-            success, message = delete_client_with_related_data(client_data["id"])
-            if not success:
-                return False, message
-        
-        # Delete group
+        # Clients, loans, payments and interest history cascade from the
+        # group delete via ON DELETE CASCADE foreign keys
         client.table("groups").delete().eq("id", group_id).execute()
-        
-        # Clear all caches
-        st.cache_data.clear()
-        
+
+        # Clear groups list and loan/payment views
+        _invalidate_table_caches("groups")
+
         return True, "Group and all related data deleted successfully"
     except Exception as e:
         return False, f"Error deleting group: {str(e)}"
@@ -828,10 +856,10 @@ def update_client(client_id, new_name, new_group_id):
             "name": new_name.strip(),
             "group_id": new_group_id
         }).eq("id", client_id).execute()
-        
+
         # Clear caches
-        st.cache_data.clear()
-        
+        _invalidate_table_caches("clients")
+
         return True, "Client updated successfully"
     except Exception as e:
         return False, f"Error updating client: {str(e)}"
@@ -846,10 +874,10 @@ def update_group(group_id, new_name, new_start_date, new_end_date):
             "start_date": new_start_date.isoformat(),
             "end_date": new_end_date.isoformat()
         }).eq("id", group_id).execute()
-        
+
         # Clear caches
-        st.cache_data.clear()
-        
+        _invalidate_table_caches("groups")
+
         return True, "Group updated successfully"
     except Exception as e:
         return False, f"Error updating group: {str(e)}"
@@ -859,16 +887,15 @@ def update_loan(loan_id, new_principal, new_due_date):
     """Update loan information"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        # Get current loan details
-        loans_data = client.table("loans_new").select("*").eq("id", loan_id).execute()
-        if not loans_data.data:
+        # Existence check only - count instead of fetching the row
+        loans_data = LOANS_TBL.select("id", count="exact", head=True).eq("id", loan_id).execute()
+        if not loans_data.count:
             return False, "Loan not found"
-        
-        current_principal = loans_data.data[0]["current_principal"]
+
         new_principal_rounded = round(float(new_principal), 2)
         
         # Update loan principal
-        client.table("loans_new").update({
+        LOANS_TBL.update({
             "current_principal": new_principal_rounded,
             "original_principal": new_principal_rounded,
             "current_due_date": new_due_date.isoformat(),
@@ -878,18 +905,18 @@ def update_loan(loan_id, new_principal, new_due_date):
         # Update or create interest record
         interest = calculate_interest(new_principal_rounded)
         
-        # Check if interest record exists
-        existing_interest = client.table("loan_interest_history").select("*").eq("loan_id", loan_id).eq("due_date", new_due_date.isoformat()).execute()
-        
-        if existing_interest.data:
-            # Update existing interest
-            client.table("loan_interest_history").update({
+        # Check if interest record exists - count only, no rows fetched
+        existing_interest = INTEREST_TBL.select("id", count="exact", head=True).eq("loan_id", loan_id).eq("due_date", new_due_date.isoformat()).execute()
+
+        if existing_interest.count:
+            # Update existing interest - keyed the same way as the check
+            INTEREST_TBL.update({
                 "interest_amount": interest,
                 "principal_at_time": new_principal_rounded
-            }).eq("id", existing_interest.data[0]["id"]).execute()
+            }).eq("loan_id", loan_id).eq("due_date", new_due_date.isoformat()).execute()
         else:
             # Create new interest record
-            client.table("loan_interest_history").insert({
+            INTEREST_TBL.insert({
                 "loan_id": loan_id,
                 "due_date": new_due_date.isoformat(),
                 "interest_amount": interest,
@@ -897,12 +924,12 @@ def update_loan(loan_id, new_principal, new_due_date):
                 "added_date": date.today().isoformat(),
                 "is_paid": 0
             }).execute()
-        
-        safe_update_loan_statuses()
-        
+
+        st.session_state.statuses_dirty = True
+
         # Clear caches
-        st.cache_data.clear()
-        
+        _invalidate_table_caches("loans_new")
+
         return True, "Loan updated successfully"
     except Exception as e:
         return False, f"Error updating loan: {str(e)}"
@@ -912,18 +939,12 @@ def delete_loan_with_related_data(loan_id):
     """Delete loan and all related data"""
     try:
         client = get_authenticated_client()  # Use authenticated client
-        # Delete related payments
-        client.table("payments_new").delete().eq("loan_id", loan_id).execute()
-        
-        # Delete related interest history
-        client.table("loan_interest_history").delete().eq("loan_id", loan_id).execute()
-        
-        # Delete loan
-        client.table("loans_new").delete().eq("id", loan_id).execute()
-        
-        # Clear all caches
-        st.cache_data.clear()
-        
+        # Payments and interest history cascade from the loan delete
+        LOANS_TBL.delete().eq("id", loan_id).execute()
+
+        # Clear loan/payment views
+        _invalidate_table_caches("loans_new")
+
         return True, "Loan and all related data deleted successfully"
     except Exception as e:
         return False, f"Error deleting loan: {str(e)}"
@@ -946,39 +967,75 @@ def style_money_cell(x, column_name):
             return ""
     return ""
 
-def style_status_cell(x):
-    if pd.isna(x):
-        return ""
-    if x == "Paid":
-        return "color: green; font-weight: bold"
-    if x == "Partial":
-        return "color: orange; font-weight: bold"
-    if x == "Overdue":
-        return "color: red; font-weight: bold"
-    return ""
+def _color_positive(col, css):
+    """Column-wise styler: returns css for every cell holding a positive number"""
+    mask = pd.to_numeric(col, errors="coerce") > 0
+    return np.where(mask, css, "")
+
+def _color_status(col):
+    """Column-wise styler for status values via np.select - one pass in C
+    instead of a Python call per cell"""
+    vals = col.to_numpy()
+    return np.select(
+        [vals == "Paid", vals == "Partial", vals == "Overdue"],
+        ["color: green; font-weight: bold",
+         "color: orange; font-weight: bold",
+         "color: red; font-weight: bold"],
+        ""
+    )
+
+@st.cache_resource
+def pdf_styles():
+    """ReportLab's default stylesheet - immutable, so build it once
+    instead of on every Generate click"""
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()
+
+@st.cache_resource
+def pdf_base_table_cmds():
+    """Immutable grid/header commands shared by every exported table"""
+    from reportlab.lib import colors as rlcolors
+    return [
+        ("GRID", (0, 0), (-1, -1), 0.5, rlcolors.black),
+        ("BACKGROUND", (0, 0), (-1, 0), rlcolors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]
+
+LOAN_DISPLAY_COLS = ['client', 'group_name', 'loan_date', 'due_date',
+                     'principal', 'interest', 'paid', 'total', 'status']
+
+# Money formatting handled by the client-side grid renderer instead of a
+# Python Styler.format pass per cell; covers both the raw and the
+# Title-cased display column names
+_MONEY_COLS = ('principal', 'interest', 'paid', 'total')
+LOAN_COL_CONFIG = {c: st.column_config.NumberColumn(format="%.2f")
+                   for c in _MONEY_COLS + tuple(c.title() for c in _MONEY_COLS)}
+
+def render_loans_table(df, empty_msg="No results found"):
+    """Shared display path for filtered loan frames - checks emptiness
+    before doing any copy/styling work"""
+    if df.empty:
+        st.info(empty_msg)
+    else:
+        st.dataframe(style_dataframe(df[LOAN_DISPLAY_COLS].copy()),
+                     column_config=LOAN_COL_CONFIG)
 
 def style_dataframe(df):
     """Apply styling with colors and formatting"""
-    numeric_cols = df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns
     sty = df.style
-    
-    if len(numeric_cols) > 0:
-        sty = sty.format("{:.2f}", subset=numeric_cols)
-    
-    # Apply styling to all numeric columns if they match the conditions
+
+    # Number formatting is done by LOAN_COL_CONFIG in the grid renderer,
+    # not a Python formatter per cell here
+
+    # Column-wise numpy masks instead of a Python lambda per cell
     for col in df.columns:
         if col.lower() in ['total', 'balance']:
-            sty = sty.applymap(lambda x: 'color: red; font-weight: bold' 
-                              if pd.notnull(x) and isinstance(x, (int, float)) and float(x) > 0 else '', 
-                              subset=[col])
+            sty = sty.apply(_color_positive, css='color: red; font-weight: bold', subset=[col])
         elif col.lower() == 'paid':
-            sty = sty.applymap(lambda x: 'color: green; font-weight: bold' 
-                              if pd.notnull(x) and isinstance(x, (int, float)) and float(x) > 0 else '', 
-                              subset=[col])
-    
-    if "status" in df.columns:
-        sty = sty.applymap(lambda v: style_status_cell(v), subset=["status"])
-    
+            sty = sty.apply(_color_positive, css='color: green; font-weight: bold', subset=[col])
+        elif col.lower() == 'status':
+            sty = sty.apply(_color_status, subset=[col])
+
     return sty
 
 # ---------- AUTH ----------
@@ -998,10 +1055,14 @@ def login_page():
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        email = st.text_input("Email")
-        password = st.text_input("Password", type="password")
-        
-        if st.button("Login"):
+        # A form batches the email/password keystrokes into one rerun on
+        # submit instead of re-executing the script per keystroke
+        with st.form("login_form"):
+            email = st.text_input("Email")
+            password = st.text_input("Password", type="password")
+            login_clicked = st.form_submit_button("Login")
+
+        if login_clicked:
             try:
                 if not email or not password:
                     st.error("Please enter both email and password")
@@ -1164,11 +1225,16 @@ def login_page():
                         st.rerun()
 
    
-def logout():
+def _sign_out_quietly():
     try:
         supabase_client.auth.sign_out()
     except:
         pass
+
+def logout():
+    # Revoke the server token in the background - the user doesn't need
+    # to wait for the ack to be logged out locally
+    threading.Thread(target=_sign_out_quietly, daemon=True).start()
     st.session_state.auth_session = None
     st.session_state.user = None
     # Clear all caches on logout
@@ -1185,10 +1251,12 @@ try:
     # Get authenticated client
     client = get_authenticated_client()
     if client:
-        # Try to get current user to verify auth
-        user_info = client.auth.get_user()
-        if not user_info.user:
-            st.error("Authentication failed. Please login again.")
+        # Validate the JWT locally from the cached session - get_session()
+        # avoids the network round trip to /user that get_user() makes on
+        # every Streamlit rerun
+        session = client.auth.get_session()
+        if session is None or (session.expires_at and session.expires_at < time.time()):
+            st.error("Session expired. Please login again.")
             st.session_state.auth_session = None
             st.session_state.user = None
             st.rerun()
@@ -1198,13 +1266,17 @@ except Exception as e:
     st.session_state.user = None
     st.rerun()
 
-business_name = get_setting("business_name") or ""
+# Read the business name once per session - it changes at most once, so
+# reruns reuse the session-state copy (set_setting keeps it current)
+if "business_name" not in st.session_state:
+    st.session_state.business_name = get_setting("business_name") or ""
+business_name = st.session_state.business_name
 
 # ---------- HEADER HELPER ----------
-def page_header(page_name: str):
-    """Display header with business name and emojis"""
-    user_display_name = st.session_state.user_display_name if hasattr(st.session_state, 'user_display_name') else st.session_state.user
-    
+@functools.lru_cache(maxsize=4)
+def _page_headers(business_name, user_display_name):
+    """Build the per-page header markup once per (business, user) pair -
+    the dict was rebuilt with ten f-strings on every rerun"""
     if business_name:
         headers = {
             "Tutorial Dashboard": f"## 👋 Welcome {user_display_name} to **{business_name}**",
@@ -1231,9 +1303,14 @@ def page_header(page_name: str):
             "Change Password": f"## 🔐 Change Password",
             "Logout": f"## 🚪 Logout"
         }
-    
+    return headers
+
+def page_header(page_name: str):
+    """Display header with business name and emojis"""
+    user_display_name = st.session_state.user_display_name if hasattr(st.session_state, 'user_display_name') else st.session_state.user
+    headers = _page_headers(business_name, user_display_name)
     st.markdown(headers.get(page_name, f"## 👋 Welcome {user_display_name}"))
-    
+
 # ---------- SIDEBAR NAV ----------
 st.sidebar.title(f"🏢 {business_name}" if business_name else "🏢 Menu")
 
@@ -1344,36 +1421,48 @@ elif menu == "📁 Groups":
     
     if not groups_df.empty:
         st.subheader("Edit or Delete Groups")
-        
-        for _, group in groups_df.iterrows():
-            with st.expander(f"📁 {group['name']} ({group['start_date']} to {group['end_date']})"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    with st.form(f"edit_group_{group['id']}"):
-                        new_name = st.text_input("Group Name", value=group['name'], key=f"name_{group['id']}")
-                        new_start = st.date_input("Start Date", value=date.fromisoformat(group['start_date']), key=f"start_{group['id']}")
-                        new_end = st.date_input("End Date", value=date.fromisoformat(group['end_date']), key=f"end_{group['id']}")
-                        
-                        if st.form_submit_button("Update Group"):
-                            success, message = update_group(group['id'], new_name, new_start, new_end)
-                            if success:
-                                st.success(message)
-                                st.rerun()
-                            else:
-                                st.error(message)
-                
-                with col2:
-                    if st.button("🗑️ Delete", key=f"delete_{group['id']}"):
-                        if can_delete_group(group['id']):
-                            success, message = delete_group_with_related_data(group['id'])
-                            if success:
-                                st.success(message)
-                                st.rerun()
-                            else:
-                                st.error(message)
+
+        # One data_editor instead of one expander+form per row - widget
+        # count stays constant no matter how many groups exist
+        edit_df = groups_df[['id', 'name', 'start_date', 'end_date']].copy()
+        edit_df['start_date'] = pd.to_datetime(edit_df['start_date']).dt.date
+        edit_df['end_date'] = pd.to_datetime(edit_df['end_date']).dt.date
+        edit_df['delete'] = False
+        edited_df = st.data_editor(
+            edit_df,
+            key="groups_editor",
+            hide_index=True,
+            num_rows="fixed",
+            column_config={
+                "id": None,
+                "name": st.column_config.TextColumn("Group Name", required=True),
+                "start_date": st.column_config.DateColumn("Start Date", required=True),
+                "end_date": st.column_config.DateColumn("End Date", required=True),
+                "delete": st.column_config.CheckboxColumn("🗑️ Delete")
+            }
+        )
+
+        if st.button("💾 Save changes", key="save_groups"):
+            changed = False
+            for orig, row in zip(edit_df.to_dict("records"), edited_df.to_dict("records")):
+                if row['delete']:
+                    if can_delete_group(orig['id']):
+                        success, message = delete_group_with_related_data(orig['id'])
+                        if success:
+                            changed = True
                         else:
-                            st.error("Cannot delete group: There are clients in this group. Delete the clients first.")
+                            st.error(message)
+                    else:
+                        st.error(f"Cannot delete group '{orig['name']}': There are clients in this group. Delete the clients first.")
+                elif (row['name'], row['start_date'], row['end_date']) != (orig['name'], orig['start_date'], orig['end_date']):
+                    success, message = update_group(orig['id'], row['name'], row['start_date'], row['end_date'])
+                    if success:
+                        changed = True
+                    else:
+                        st.error(message)
+            if changed:
+                st.success("✅ Changes saved")
+                st.rerun()
 
     st.subheader("Create a new group")
     with st.form("add_group", clear_on_submit=True):
@@ -1409,13 +1498,16 @@ elif menu == "👤 Clients":
     groups_data = get_table_data("groups", order_by="name")
     groups_df = pd.DataFrame(groups_data) if groups_data else pd.DataFrame()
     group_names = groups_df["name"].tolist() if not groups_df.empty else []
-    
+    # Name -> id map so form submits don't round-trip to translate the
+    # selected name back to its id
+    group_name_to_id = dict(zip(groups_df["name"], groups_df["id"])) if not groups_df.empty else {}
+
     # Get clients data with group info (direct query with caching)
     try:
         # Store in session state to avoid repeated queries on same page
         if "user_clients_data" not in st.session_state:
             client = get_authenticated_client()  # Use authenticated client
-            clients_data = client.table("clients").select("*, groups(name)").order("name").execute()
+            clients_data = client.table("clients").select("id, name, group_id, groups(name)").order("name").execute()
             st.session_state.user_clients_data = clients_data.data
         else:
             clients_data = type('obj', (object,), {'data': st.session_state.user_clients_data})
@@ -1435,62 +1527,56 @@ elif menu == "👤 Clients":
     
     if not clients_df.empty:
         st.subheader("Edit or Delete Clients")
-        
-        for _, client_data in clients_df.iterrows():
-            with st.expander(f"👤 {client_data['name']} (Group: {client_data['group_name'] or 'No Group'})"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    with st.form(f"edit_client_{client_data['id']}"):
-                        new_name = st.text_input("Client Name", value=client_data['name'], key=f"name_{client_data['id']}")
-                        
-                        # Find current group index
-                        current_group_name = client_data['group_name'] or "-- choose group --"
-                        group_options = ["-- choose group --"] + group_names
-                        current_index = group_options.index(current_group_name) if current_group_name in group_options else 0
-                        
-                        new_group = st.selectbox("Group", group_options, index=current_index, key=f"group_{client_data['id']}")
-                        
-                        if st.form_submit_button("Update Client"):
-                            if new_group == "-- choose group --":
-                                st.error("Please select a group")
-                            else:
-                                # Get the new group ID
-                                client = get_authenticated_client()  # Use authenticated client
-                                new_group_id_result = client.table("groups").select("id").eq("name", new_group).execute()
-                                if new_group_id_result.data:
-                                    new_group_id = new_group_id_result.data[0]["id"]
-                                    success, message = update_client(client_data['id'], new_name, new_group_id)
-                                    if success:
-                                        # Update session state
-                                        if "user_clients_data" in st.session_state:
-                                            del st.session_state.user_clients_data
-                                        st.success(message)
-                                        st.rerun()
-                                    else:
-                                        st.error(message)
-                                else:
-                                    st.error("Selected group not found in database")
-                
-                with col2:
-                    if st.button("🗑️ Delete", key=f"delete_{client_data['id']}"):
-                        if can_delete_client(client_data['id']):
-                            success, message = delete_client_with_related_data(client_data['id'])
-                            if success:
-                                # Update session state
-                                if "user_clients_data" in st.session_state:
-                                    del st.session_state.user_clients_data
-                                st.success(message)
-                                st.rerun()
-                            else:
-                                st.error(message)
+
+        # One data_editor instead of one expander+form per row
+        edit_df = clients_df[['id', 'name', 'group_name']].copy()
+        edit_df['delete'] = False
+        edited_df = st.data_editor(
+            edit_df,
+            key="clients_editor",
+            hide_index=True,
+            num_rows="fixed",
+            column_config={
+                "id": None,
+                "name": st.column_config.TextColumn("Client Name", required=True),
+                "group_name": st.column_config.SelectboxColumn("Group", options=group_names, required=True),
+                "delete": st.column_config.CheckboxColumn("🗑️ Delete")
+            }
+        )
+
+        if st.button("💾 Save changes", key="save_clients"):
+            changed = False
+            for orig, row in zip(edit_df.to_dict("records"), edited_df.to_dict("records")):
+                if row['delete']:
+                    if can_delete_client(orig['id']):
+                        success, message = delete_client_with_related_data(orig['id'])
+                        if success:
+                            changed = True
                         else:
-                            st.error("Cannot delete client: There are loans associated with this client. Delete the loans first.")
+                            st.error(message)
+                    else:
+                        st.error(f"Cannot delete client '{orig['name']}': There are loans associated with this client. Delete the loans first.")
+                elif (row['name'], row['group_name']) != (orig['name'], orig['group_name']):
+                    new_group_id = group_name_to_id.get(row['group_name'])
+                    if new_group_id is None:
+                        st.error(f"Group '{row['group_name']}' not found in database")
+                        continue
+                    success, message = update_client(orig['id'], row['name'], new_group_id)
+                    if success:
+                        changed = True
+                    else:
+                        st.error(message)
+            if changed:
+                # Update session state
+                if "user_clients_data" in st.session_state:
+                    del st.session_state.user_clients_data
+                st.success("✅ Changes saved")
+                st.rerun()
 
     st.subheader("Add a client")
     with st.form("add_client", clear_on_submit=True):
         cname = st.text_input("Client full name")
-        gsel = st.selectbox("Group", ["-- choose group --"] + group_names, key="add_client_group")
+        gsel = st.selectbox("Group", cached_group_choices(get_current_user_id(), "-- choose group --"), key="add_client_group")
         
         if st.form_submit_button("Add client"):
             if not cname.strip():
@@ -1498,10 +1584,9 @@ elif menu == "👤 Clients":
             elif gsel == "-- choose group --":
                 st.error("Choose a group first")
             else:
-                client = get_authenticated_client()  # Use authenticated client
-                group_result = client.table("groups").select("id").eq("name", gsel).execute()
-                if group_result.data:
-                    group_id = group_result.data[0]["id"]
+                # The groups table is already loaded - no lookup round trip
+                group_id = group_name_to_id.get(gsel)
+                if group_id is not None:
                     try:
                         insert_table_data("clients", {
                             "name": cname.strip(),
@@ -1529,50 +1614,63 @@ elif menu == "👤 Clients":
 elif menu == "💰 Loans":
     page_header("Loans")
     
-    # Get clients for dropdown (uses cached version)
+    # Fetch sequentially: worker threads lack the Streamlit
+    # ScriptRunContext, so session_state (and the user id) is empty there
+    # and the caches would be poisoned with empty results. Both calls are
+    # cached anyway, so there is no overlap win to chase.
     clients_data = get_table_data("clients", order_by="name")
+    loans_df = get_loans_simple_view()
+
     clients_df = pd.DataFrame(clients_data) if clients_data else pd.DataFrame()
-    client_options = clients_df["name"].tolist() if not clients_df.empty else []
-    
-    # Get loans data (uses cached version)
-    loans_list = get_loans_simple_view()
-    loans_df = pd.DataFrame(loans_list) if loans_list else pd.DataFrame()
-    
+    # Name -> id map so the create form doesn't round-trip on submit
+    client_name_to_id = dict(zip(clients_df["name"], clients_df["id"])) if not clients_df.empty else {}
+
     if not loans_df.empty:
         st.subheader("Edit or Delete Loans")
-        
-        for _, loan in loans_df.iterrows():
-            with st.expander(f"💰 {loan['client']} - {loan['loan_date']} (Total: R{loan['total']:.2f})"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    with st.form(f"edit_loan_{loan['id']}"):
-                        new_principal = st.number_input("Principal (R)", min_value=0.0, format="%.2f", 
-                                                       value=float(loan['principal']), key=f"principal_{loan['id']}")
-                        new_due_date = st.date_input("Due Date", 
-                                                    value=date.fromisoformat(loan['due_date']), 
-                                                    key=f"due_{loan['id']}")
-                        
-                        if st.form_submit_button("Update Loan"):
-                            success, message = update_loan(loan['id'], new_principal, new_due_date)
-                            if success:
-                                st.success(message)
-                                st.rerun()
-                            else:
-                                st.error(message)
-                
-                with col2:
-                    if st.button("🗑️ Delete", key=f"delete_loan_{loan['id']}"):
-                        success, message = delete_loan_with_related_data(loan['id'])
-                        if success:
-                            st.success(message)
-                            st.rerun()
-                        else:
-                            st.error(message)
+
+        # One data_editor instead of one expander+form per row - only
+        # principal and due date are editable, the rest is context
+        edit_df = loans_df[['id', 'client', 'loan_date', 'principal', 'due_date']].copy()
+        edit_df['due_date'] = pd.to_datetime(edit_df['due_date']).dt.date
+        edit_df['delete'] = False
+        edited_df = st.data_editor(
+            edit_df,
+            key="loans_editor",
+            hide_index=True,
+            num_rows="fixed",
+            disabled=["client", "loan_date"],
+            column_config={
+                "id": None,
+                "client": st.column_config.TextColumn("Client"),
+                "loan_date": st.column_config.TextColumn("Loan Date"),
+                "principal": st.column_config.NumberColumn("Principal (R)", min_value=0.0, format="%.2f", required=True),
+                "due_date": st.column_config.DateColumn("Due Date", required=True),
+                "delete": st.column_config.CheckboxColumn("🗑️ Delete")
+            }
+        )
+
+        if st.button("💾 Save changes", key="save_loans"):
+            changed = False
+            for orig, row in zip(edit_df.to_dict("records"), edited_df.to_dict("records")):
+                if row['delete']:
+                    success, message = delete_loan_with_related_data(orig['id'])
+                    if success:
+                        changed = True
+                    else:
+                        st.error(message)
+                elif (row['principal'], row['due_date']) != (orig['principal'], orig['due_date']):
+                    success, message = update_loan(orig['id'], row['principal'], row['due_date'])
+                    if success:
+                        changed = True
+                    else:
+                        st.error(message)
+            if changed:
+                st.success("✅ Changes saved")
+                st.rerun()
 
     st.subheader("Create a new loan")
     with st.form("add_loan", clear_on_submit=True):
-        client_sel = st.selectbox("Client", ["-- choose client --"] + client_options)
+        client_sel = st.selectbox("Client", cached_client_choices(get_current_user_id(), "-- choose client --"))
         loan_date = st.date_input("Loan Date", value=date.today())
         due_date = st.date_input("Due Date", value=date.today() + timedelta(days=30))
         principal = st.number_input("Principal (R)", min_value=0.0, format="%.2f", value=0.0)
@@ -1583,42 +1681,30 @@ elif menu == "💰 Loans":
             elif principal <= 0:
                 st.error("Principal must be > 0")
             else:
-                client = get_authenticated_client()  # Use authenticated client
-                client_result = client.table("clients").select("id").eq("name", client_sel).execute()
-                if client_result.data:
-                    client_id = client_result.data[0]["id"]
+                # The clients table is already loaded - no lookup round trip
+                client_id = client_name_to_id.get(client_sel)
+                if client_id is not None:
                     principal_rounded = round(float(principal), 2)
                     interest = calculate_interest(principal_rounded)
                     total = principal_rounded + interest
                     
                     try:
-                        # Create loan
-                        loan_data = insert_table_data("loans_new", {
-                            "client_id": client_id,
-                            "loan_date": loan_date.isoformat(),
-                            "original_due_date": due_date.isoformat(),
-                            "current_due_date": due_date.isoformat(),
-                            "original_principal": principal_rounded,
-                            "current_principal": principal_rounded,
-                            "status": "Partial"
-                        })
-                        
-                        if loan_data:
-                            loan_id = loan_data["id"]
-                            
-                            # Record initial interest
-                            insert_table_data("loan_interest_history", {
-                                "loan_id": loan_id,
-                                "due_date": due_date.isoformat(),
-                                "interest_amount": interest,
-                                "principal_at_time": principal_rounded,
-                                "added_date": date.today().isoformat(),
-                                "is_paid": 0
-                            })
-                            
-                            safe_update_loan_statuses()
-                            st.success(f"✅ Loan recorded (Total: R {total:.2f})")
-                            st.rerun()
+                        # One RPC creates the loan and its initial interest
+                        # entry in a single transaction - no orphaned loan
+                        # row if the second insert fails
+                        client = get_authenticated_client()
+                        client.rpc("create_loan", {
+                            "p_client_id": client_id,
+                            "p_loan_date": loan_date.isoformat(),
+                            "p_due_date": due_date.isoformat(),
+                            "p_principal": principal_rounded,
+                            "p_interest": interest
+                        }).execute()
+
+                        _invalidate_table_caches("loans_new")
+                        st.session_state.statuses_dirty = True
+                        st.success(f"✅ Loan recorded (Total: R {total:.2f})")
+                        st.rerun()
                     except Exception as e:
                         st.error(f"Could not create loan: {e}")
                 else:
@@ -1626,20 +1712,19 @@ elif menu == "💰 Loans":
 
     st.subheader("All loans (full details)")
     
-    # Update statuses before showing
-    safe_update_loan_statuses()
-    
-    # Refresh loans data (uses cached version)
-    loans_list = get_loans_simple_view()
-    loans_df = pd.DataFrame(loans_list) if loans_list else pd.DataFrame()
-    
+    # Update statuses before showing; only refetch when the pass actually
+    # changed rows - otherwise the frame from the top of the page is
+    # still current
+    if maybe_update_loan_statuses():
+        loans_df = get_loans_simple_view()
+
     if not loans_df.empty:
         display_df = loans_df[['client', 'group_name', 'loan_date', 'due_date', 
                               'principal', 'interest', 'paid', 'total', 'status']].copy()
         display_df.columns = ['Client', 'Group Name', 'Loan Date', 'Due Date', 'Principal', 'Interest', 'Paid', 'Total', 'Status']
         # Apply styling
         styled_df = style_dataframe(display_df)
-        st.dataframe(styled_df)
+        st.dataframe(styled_df, column_config=LOAN_COL_CONFIG)
     else:
         st.info("No loans yet. Create one above.")
 
@@ -1648,61 +1733,77 @@ elif menu == "💳 Payments":
     page_header("Payments")
     
     # Update statuses first
-    safe_update_loan_statuses()
+    maybe_update_loan_statuses()
     
     # Get active loans for dropdown
     try:
         client = get_authenticated_client()  # Use authenticated client
         # Get loans that are not paid
-        loans_data = client.table("loans_new").select("*, clients(name)").neq("status", "Paid").order("current_due_date").execute()
-        
+        loans_data = LOANS_TBL.select(
+            "id, loan_date, current_due_date, current_principal, status, clients(name)"
+        ).neq("status", "Paid").order("current_due_date").execute()
+
+        # Sum unpaid interest for all active loans in one query instead of
+        # one query per loan
+        unpaid_by_loan = defaultdict(float)
+        loan_ids = [loan["id"] for loan in loans_data.data]
+        if loan_ids:
+            interest_rows = INTEREST_TBL.select("loan_id, interest_amount").in_("loan_id", loan_ids).eq("is_paid", 0).gt("interest_amount", 0).execute()
+            for item in interest_rows.data:
+                unpaid_by_loan[item["loan_id"]] += item["interest_amount"]
+
         active_loans = []
         for loan in loans_data.data:
-            # Calculate unpaid interest
-            interest_data = client.table("loan_interest_history").select("interest_amount").eq("loan_id", loan["id"]).eq("is_paid", 0).gt("interest_amount", 0).execute()
-            unpaid_interest = sum(item["interest_amount"] for item in interest_data.data)
-            
             active_loans.append({
                 "id": loan["id"],
                 "client_name": loan["clients"]["name"] if loan.get("clients") else "",
                 "loan_date": loan["loan_date"],
                 "current_due_date": loan["current_due_date"],
                 "current_principal": loan["current_principal"],
-                "unpaid_interest": unpaid_interest,
+                "unpaid_interest": unpaid_by_loan[loan["id"]],
                 "status": loan["status"]
             })
         
-        active_loans_df = pd.DataFrame(active_loans)
+        # id -> loan dict for O(1) lookups; no DataFrame needed on this
+        # page since nothing here is displayed as a table
+        active_loans_by_id = {loan["id"]: loan for loan in active_loans}
     except Exception as e:
         st.error(f"Error fetching active loans: {e}")
-        active_loans_df = pd.DataFrame()
+        active_loans = []
+        active_loans_by_id = {}
     
     st.subheader("Record a payment")
     
-    if active_loans_df.empty:
+    if not active_loans:
         st.info("No active loans found. All loans may be fully paid.")
     else:
-        # Create loan selection options
-        loan_options = []
-        for _, loan in active_loans_df.iterrows():
+        # Build loan labels keyed by id - the selectbox then holds ids as
+        # values and renders labels via format_func, so the selection
+        # never needs to be parsed or index()-scanned back to an id.
+        # Iterate the list of dicts directly, iterrows builds a Series
+        # per row
+        loan_labels = {}
+        for loan in active_loans:
             total_owed = loan['current_principal'] + loan['unpaid_interest']
-            option_text = f"{loan['client_name']} (Loan: {loan['loan_date']}) - Total: R{total_owed:.2f}, Due: {loan['current_due_date']}"
-            loan_options.append((loan['id'], option_text, loan['unpaid_interest'], loan['current_due_date']))
-        
+            loan_labels[loan['id']] = f"{loan['client_name']} (Loan: {loan['loan_date']}) - Total: R{total_owed:.2f}, Due: {loan['current_due_date']}"
+
         with st.form("add_payment", clear_on_submit=True):
-            loan_choices = ["-- choose loan --"] + [opt[1] for opt in loan_options]
-            selected_option = st.selectbox("Select loan", loan_choices)
-            
+            selected_loan_id = st.selectbox(
+                "Select loan",
+                options=[None] + list(loan_labels),
+                format_func=lambda i: "-- choose loan --" if i is None else loan_labels[i]
+            )
+
             amount = st.number_input("Amount (R)", min_value=0.0, format="%.2f", value=0.0)
             pay_date = st.date_input("Payment date", value=date.today())
-            
-            if selected_option != "-- choose loan --":
-                selected_index = loan_choices.index(selected_option) - 1
-                selected_loan_id, _, unpaid_interest, due_date_str = loan_options[selected_index]
-                
+
+            if selected_loan_id is not None:
+                loan_details = active_loans_by_id[selected_loan_id]
+                unpaid_interest = loan_details['unpaid_interest']
+                due_date_str = loan_details['current_due_date']
+
                 col1, col2 = st.columns(2)
                 with col1:
-                    loan_details = active_loans_df[active_loans_df['id'] == selected_loan_id].iloc[0]
                     st.info(f"**Client:** {loan_details['client_name']}")
                     st.info(f"**Principal:** R {loan_details['current_principal']:.2f}")
                 with col2:
@@ -1715,14 +1816,15 @@ elif menu == "💳 Payments":
                     st.warning(f"⚠️ **Minimum Payment:** Payment is on or after due date. You must pay at least R {unpaid_interest:.2f} (unpaid interest).")
             
             if st.form_submit_button("Record payment"):
-                if selected_option == "-- choose loan --":
+                if selected_loan_id is None:
                     st.error("Select a loan")
                 elif amount <= 0:
                     st.error("Amount must be > 0")
                 else:
-                    selected_index = loan_choices.index(selected_option) - 1
-                    selected_loan_id, _, unpaid_interest, due_date_str = loan_options[selected_index]
-                    
+                    loan_details = active_loans_by_id[selected_loan_id]
+                    unpaid_interest = loan_details['unpaid_interest']
+                    due_date_str = loan_details['current_due_date']
+
                     # Enforce minimum payment rule
                     due_date = date.fromisoformat(due_date_str) if due_date_str else date.today()
                     if pay_date >= due_date and amount < unpaid_interest:
@@ -1736,7 +1838,7 @@ elif menu == "💳 Payments":
                         
                         # Show payment breakdown
                         client = get_authenticated_client()  # Use authenticated client
-                        payment_details = client.table("payments_new").select("*").eq("loan_id", selected_loan_id).order("id", desc=True).limit(1).execute()
+                        payment_details = PAYMENTS_TBL.select("applied_to_interest, applied_to_principal").eq("loan_id", selected_loan_id).order("id", desc=True).limit(1).execute()
                         
                         if payment_details.data:
                             payment = payment_details.data[0]
@@ -1759,7 +1861,7 @@ elif menu == "💳 Payments":
         display_df.columns = ['Client', 'Group Name', 'Loan Date', 'Due Date', 'Principal', 'Interest', 'Paid', 'Total', 'Payment Date', 'Status']
         # Apply styling
         styled_df = style_dataframe(display_df)
-        st.dataframe(styled_df)
+        st.dataframe(styled_df, column_config=LOAN_COL_CONFIG)
     else:
         st.info("No payments recorded yet.")
 
@@ -1767,47 +1869,47 @@ elif menu == "💳 Payments":
 elif menu == "📆 Monthly Overview":
     page_header("Monthly Overview")
     st.caption("Grouped by month & group. Shows each client, all loan info & statuses")
-    
-    safe_update_loan_statuses()
+
+    # Statuses are refreshed by the gated call at the end of the script
 
     # Get loans data (uses cached version)
-    loans_list = get_loans_simple_view()
-    if loans_list:
-        monthly_df = pd.DataFrame(loans_list)
-        monthly_df['month'] = pd.to_datetime(monthly_df['loan_date']).dt.strftime('%B %Y') # Extract YYYY-MM
-        
-        if not monthly_df.empty:
-            months = monthly_df["month"].unique().tolist()
-            for m in months:
+    monthly_df = get_loans_simple_view()
+    # Emptiness checked before any grouping or styling work happens
+    if not monthly_df.empty:
+        # One groupby walk instead of nested unique()/boolean-mask
+        # scans over the full frame per month and group. Sort by the
+        # actual loan date first (ISO strings order chronologically):
+        # the month label is derived from it, so sorted rows keep each
+        # month contiguous and sort=False then just preserves that order
+        # - grouping on pair first-occurrence alone could interleave
+        # months and repeat the subheader
+        monthly_df = monthly_df.sort_values("loan_date", kind="stable")
+        prev_month = None
+        for (m, group_name), sub in monthly_df.groupby(["month", "group_name"], sort=False, observed=True):
+            if m != prev_month:
                 st.subheader(f"📅 {m}")
-                dfm = monthly_df[monthly_df["month"] == m]
-                
-                for group_name in dfm["group_name"].unique():
-                    st.markdown(f"**📁 {group_name or 'No Group'}**")
-                    sub = dfm[dfm["group_name"] == group_name][[
-                        "client", "loan_date", "due_date", "principal", 
-                        "interest", "paid", "total", "status"
-                    ]]
-                    
-                    # Style the dataframe
-                    styled_sub = sub.copy()
-                    styled_sub['status'] = styled_sub['status'].apply(status_color)
-                    
-                    # Create a styled dataframe
-                    display_df = styled_sub.style.applymap(
-                        lambda x: 'color: red' if isinstance(x, (int, float)) and x > 0 and x == styled_sub['total'].iloc[0] else '',
-                        subset=['total']
-                    ).applymap(
-                        lambda x: 'color: green' if isinstance(x, (int, float)) and x > 0 and x == styled_sub['paid'].iloc[0] else '',
-                        subset=['paid']
-                    )
-                    
-                    st.dataframe(display_df.format({
-                        'principal': '{:.2f}',
-                        'interest': '{:.2f}',
-                        'paid': '{:.2f}',
-                        'total': '{:.2f}'
-                    }))
+                prev_month = m
+
+            st.markdown(f"**📁 {group_name or 'No Group'}**")
+            sub = sub[[
+                "client", "loan_date", "due_date", "principal",
+                "interest", "paid", "total", "status"
+            ]]
+
+            # Style the dataframe
+            styled_sub = sub.copy()
+            styled_sub['status'] = styled_sub['status'].apply(status_color)
+            
+            # Create a styled dataframe - column-wise numpy masks
+            # instead of a Python lambda per cell (which also
+            # compared against .iloc[0] rather than each value)
+            display_df = styled_sub.style.apply(
+                _color_positive, css='color: red', subset=['total']
+            ).apply(
+                _color_positive, css='color: green', subset=['paid']
+            )
+            
+            st.dataframe(display_df, column_config=LOAN_COL_CONFIG)
     else:
         st.info("No loans to show in monthly overview.")
 
@@ -1815,67 +1917,41 @@ elif menu == "📆 Monthly Overview":
 elif menu == "🔍 Search":
     page_header("Search")
     st.markdown("Search by Client, Group, or Due Date")
-    
-    safe_update_loan_statuses()
-    
+
+    # Statuses are refreshed by the gated call at the end of the script
+
     search_type = st.radio("Search by", ["Client", "Group", "Due Date"], horizontal=True)
     
     if search_type == "Client":
         q = st.text_input("Client name contains")
         if q:
-            loans_list = get_loans_simple_view()
-            if loans_list:
-                df = pd.DataFrame(loans_list)
-                df = df[df['client'].str.contains(q, case=False, na=False)]
-                if not df.empty:
-                    display_df = df[['client', 'group_name', 'loan_date', 'due_date', 'principal', 'interest', 'paid', 'total', 'status']].copy()
-                    styled_df = style_dataframe(display_df)
-                    st.dataframe(styled_df)
-                else:
-                    st.info("No results found")
-    
+            df = get_loans_simple_view()
+            if not df.empty:
+                # Case-insensitive match against the precomputed lowercase
+                # column; regex=False keeps it a plain substring scan
+                df = df[df['_client_lc'].str.contains(q.lower(), na=False, regex=False)]
+            render_loans_table(df)
+
     elif search_type == "Group":
-        groups_data = get_table_data("groups", order_by="name")
-        groups_df = pd.DataFrame(groups_data) if groups_data else pd.DataFrame()
-        gsel = st.selectbox("Select group", ["-- choose --"] + groups_df["name"].tolist() if not groups_df.empty else ["-- choose --"])
+        gsel = st.selectbox("Select group", cached_group_choices(get_current_user_id(), "-- choose --"))
         if gsel and gsel != "-- choose --":
-            loans_list = get_loans_simple_view()
-            if loans_list:
-                df = pd.DataFrame(loans_list)
-                df = df[df['group_name'] == gsel]
-                if not df.empty:
-                    display_df = df[['client', 'group_name', 'loan_date', 'due_date', 'principal', 'interest', 'paid', 'total', 'status']].copy()
-                    styled_df = style_dataframe(display_df)
-                    st.dataframe(styled_df)
-                else:
-                    st.info("No loans for that group.")
+            # Filter server-side - only that group's loans cross the wire
+            render_loans_table(get_loans_simple_view(group_name=gsel),
+                               "No loans for that group.")
     
     else:  # Due Date
         d = st.date_input("Due Date")
         if d:
-            loans_list = get_loans_simple_view()
-            if loans_list:
-                df = pd.DataFrame(loans_list)
-                df = df[df['due_date'] == d.isoformat()]
-                if not df.empty:
-                    display_df = df[['client', 'group_name', 'loan_date', 'due_date', 'principal', 'interest', 'paid', 'total', 'status']].copy()
-                    styled_df = style_dataframe(display_df)
-                    st.dataframe(styled_df)
-                else:
-                    st.info("No loans due on that date")
+            df = get_loans_simple_view()
+            if not df.empty:
+                # Vectorized comparison on the typed column - no per-row
+                # string equality against d.isoformat()
+                df = df[df['due_date_dt'] == np.datetime64(d)]
+            render_loans_table(df, "No loans due on that date")
 # ---------- PAGE: PDF Export ----------
 elif menu == "🧾 PDF Export":
     page_header("PDF Report")
     
-    # Get clients for selection
-    clients_data = get_table_data("clients", order_by="name")
-    clients_df = pd.DataFrame(clients_data) if clients_data else pd.DataFrame()
-    client_names = clients_df["name"].tolist() if not clients_df.empty else []
-    
-    # Get groups for selection
-    groups_data = get_table_data("groups", order_by="name")
-    groups_df = pd.DataFrame(groups_data) if groups_data else pd.DataFrame()
-    group_names = groups_df["name"].tolist() if not groups_df.empty else []
     
     col1, col2 = st.columns(2)
     with col1:
@@ -1883,9 +1959,9 @@ elif menu == "🧾 PDF Export":
     
     with col2:
         if export_type == "Client Statement":
-            client_sel = st.selectbox("Select client", ["-- choose client --"] + client_names)
+            client_sel = st.selectbox("Select client", cached_client_choices(get_current_user_id(), "-- choose client --"))
         else:
-            group_sel = st.selectbox("Select group", ["-- choose group --"] + group_names)
+            group_sel = st.selectbox("Select group", cached_group_choices(get_current_user_id(), "-- choose group --"))
     
     if st.button("Generate PDF"):
         if export_type == "Client Statement" and client_sel == "-- choose client --":
@@ -1894,56 +1970,51 @@ elif menu == "🧾 PDF Export":
             st.error("Select a group")
         else:
             # Update statuses before generating report
-            safe_update_loan_statuses()
+            maybe_update_loan_statuses()
             
             if export_type == "Client Statement":
-                loans_list = get_loans_simple_view()
-                if loans_list:
-                    df = pd.DataFrame(loans_list)
-                    loans_df = df[df['client'] == client_sel]
-
-                    # 🔹 SORT BY LOAN DATE (EARLY → LATE)
-                    loans_df['loan_date'] = pd.to_datetime(loans_df['loan_date'])
-                    loans_df = loans_df.sort_values(by='loan_date', ascending=True)
-                    
-                    if loans_df.empty:
-                        st.error("No loans found for this client")
-                        st.stop()
-                    
-                    filename = f"{client_sel.replace(' ','_')}_statement_{date.today().isoformat()}.pdf"
-                    title = f"Client Statement - {client_sel}"
-                    data_type = "client"
-                else:
-                    st.error("No loans found")
+                # Filter server-side - only this client's loans cross the wire
+                loans_df = get_loans_simple_view(client_name=client_sel)
+                if loans_df.empty:
+                    st.error("No loans found for this client")
                     st.stop()
+
+                # 🔹 SORT BY LOAN DATE (EARLY → LATE)
+                loans_df['loan_date'] = pd.to_datetime(loans_df['loan_date'])
+                loans_df = loans_df.sort_values(by='loan_date', ascending=True)
+
+                filename = f"{client_sel.replace(' ','_')}_statement_{date.today().isoformat()}.pdf"
+                title = f"Client Statement - {client_sel}"
+                data_type = "client"
                 
             else:  # Group Report
-                loans_list = get_loans_simple_view()
-                if loans_list:
-                    df = pd.DataFrame(loans_list)
-                    loans_df = df[df['group_name'] == group_sel]
-
-                    # 🔹 SORT BY LOAN DATE (EARLY → LATE)
-                    loans_df['loan_date'] = pd.to_datetime(loans_df['loan_date'])
-                    loans_df = loans_df.sort_values(by='loan_date', ascending=True)
-                    
-                    if loans_df.empty:
-                        st.error("No loans found for this group")
-                        st.stop()
-                    
-                    filename = f"{group_sel.replace(' ','_')}_report_{date.today().isoformat()}.pdf"
-                    title = f"Group Report - {group_sel}"
-                    data_type = "group"
-                else:
-                    st.error("No loans found")
+                # Filter server-side - only that group's loans cross the wire
+                loans_df = get_loans_simple_view(group_name=group_sel)
+                if loans_df.empty:
+                    st.error("No loans found for this group")
                     st.stop()
+
+                # 🔹 SORT BY LOAN DATE (EARLY → LATE)
+                loans_df['loan_date'] = pd.to_datetime(loans_df['loan_date'])
+                loans_df = loans_df.sort_values(by='loan_date', ascending=True)
+
+                filename = f"{group_sel.replace(' ','_')}_report_{date.today().isoformat()}.pdf"
+                title = f"Group Report - {group_sel}"
+                data_type = "group"
             
             # ---------- CREATE PDF IN MEMORY ----------
+            # reportlab is only needed here, so import it on first use
+            # instead of paying for it on every script rerun
             import io
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+            from reportlab.lib import colors as rlcolors
+
             buffer = io.BytesIO()
-            
-            doc = SimpleDocTemplate(buffer)
-            styles = getSampleStyleSheet()
+
+            # pageCompression flate-encodes the content streams, cutting
+            # the size of the download
+            doc = SimpleDocTemplate(buffer, pageCompression=1)
+            styles = pdf_styles()
             story = []
             
             # Header
@@ -1955,56 +2026,66 @@ elif menu == "🧾 PDF Export":
             # Loans table
             story.append(Paragraph("Loans Overview", styles["Heading2"]))
             
-            table_data = [["Client", "Group", "Loan Date", "Due Date", "Principal", "Interest", "Paid", "Total", "Status"]]
-            
-            for _, row in loans_df.iterrows():
-                status_display = status_color(row['status'])
-                
-                table_data.append([
-                    row['client'] if data_type == 'group' else '',
-                    row['group_name'] if data_type == 'client' else '',
-                    row['loan_date'].date().isoformat(),
-                    row['due_date'],
-                    f"R {row['principal']:.2f}",
-                    f"R {row['interest']:.2f}",
-                    f"R {row['paid']:.2f}",
-                    f"R {row['total']:.2f}",
-                    status_display.replace("🟢", "").replace("🟡", "").replace("🔴", "").strip()
-                ])
+            # Build each column with one vectorized pass instead of
+            # boxing every row into a Series via iterrows
+            n = len(loans_df)
+            client_col = loans_df['client'].tolist() if data_type == 'group' else [''] * n
+            group_col = loans_df['group_name'].tolist() if data_type == 'client' else [''] * n
+            loan_date_str = loans_df['loan_date'].dt.strftime('%Y-%m-%d')
+            principal_str = "R " + loans_df['principal'].map('{:.2f}'.format)
+            interest_str = "R " + loans_df['interest'].map('{:.2f}'.format)
+            paid_str = "R " + loans_df['paid'].map('{:.2f}'.format)
+            total_str = "R " + loans_df['total'].map('{:.2f}'.format)
+            status_clean = (
+                loans_df['status'].map(status_color)
+                .str.replace(_STATUS_EMOJI_RE, "", regex=True)
+                .str.strip()
+            )
+
+            header = ["Client", "Group", "Loan Date", "Due Date", "Principal", "Interest", "Paid", "Total", "Status"]
+            rows = list(zip(client_col, group_col, loan_date_str, loans_df['due_date'],
+                            principal_str, interest_str, paid_str, total_str, status_clean))
+            table_data = [header] + rows
             
+            # Collect every styling command up front and build the
+            # TableStyle once, instead of one style.add() per colored
+            # cell; numpy masks on the numeric columns pick the rows
+            # (row 0 is the header, hence the +1)
+            cmds = list(pdf_base_table_cmds())
+
+            # One classification pass over the raw arrays - the numeric
+            # comparisons and the status dispatch all reduce to index
+            # arrays, no per-row Python branching
+            total_arr = loans_df['total'].to_numpy()
+            paid_arr = loans_df['paid'].to_numpy()
+            status_arr = loans_df['status'].to_numpy()
+
+            total_pos_idx = np.flatnonzero(total_arr > 0) + 1
+            paid_pos_idx = np.flatnonzero(paid_arr > 0) + 1
+
+            cmds += [("TEXTCOLOR", (7, i), (7, i), rlcolors.red) for i in total_pos_idx]
+            cmds += [("TEXTCOLOR", (6, i), (6, i), rlcolors.green) for i in paid_pos_idx]
+            # Color by the raw status enum straight off the loans table -
+            # one mapping drives the dispatch, no substring probing of
+            # the emoji-stripped display strings
+            status_colors = {
+                "Paid": rlcolors.green,
+                "Partial": rlcolors.orange,
+                "Overdue": rlcolors.red,
+            }
+            for status_value, color in status_colors.items():
+                cmds += [("TEXTCOLOR", (8, i), (8, i), color)
+                         for i in np.flatnonzero(status_arr == status_value) + 1]
+
             t = Table(table_data, repeatRows=1)
-            style = TableStyle([
-                ("GRID", (0,0), (-1,-1), 0.5, rlcolors.black),
-                ("BACKGROUND", (0,0), (-1,0), rlcolors.lightgrey),
-                ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-            ])
-            
-            for i in range(1, len(table_data)):
-                total_value = float(table_data[i][7].replace('R', '').strip())
-                if total_value > 0:
-                    style.add("TEXTCOLOR", (7, i), (7, i), rlcolors.red)
-                
-                paid_value = float(table_data[i][6].replace('R', '').strip())
-                if paid_value > 0:
-                    style.add("TEXTCOLOR", (6, i), (6, i), rlcolors.green)
-                
-                status_text = table_data[i][8]
-                if "Paid" in status_text:
-                    style.add("TEXTCOLOR", (8, i), (8, i), rlcolors.green)
-                elif "Partial" in status_text:
-                    style.add("TEXTCOLOR", (8, i), (8, i), rlcolors.orange)
-                elif "Overdue" in status_text:
-                    style.add("TEXTCOLOR", (8, i), (8, i), rlcolors.red)
-            
-            t.setStyle(style)
+            t.setStyle(TableStyle(cmds))
             story.append(t)
             story.append(Spacer(1, 12))
             
-            # Summary
-            total_principal = loans_df['principal'].sum()
-            total_interest = loans_df['interest'].sum()
-            total_paid = loans_df['paid'].sum()
-            total_total = loans_df['total'].sum()
+            # Summary - one reduction over a single numpy view instead of
+            # four separate column scans
+            totals = loans_df[['principal', 'interest', 'paid', 'total']].to_numpy().sum(axis=0)
+            total_principal, total_interest, total_paid, total_total = totals
             
             story.append(Paragraph("Summary", styles["Heading2"]))
             summary_data = [
@@ -2025,14 +2106,15 @@ elif menu == "🧾 PDF Export":
             
             # Build PDF
             doc.build(story)
-            pdf_data = buffer.getvalue()
-            buffer.close()
-            
+            buffer.seek(0)
+
             st.success("✅ PDF generated successfully!")
-            
+
+            # Hand download_button the BytesIO itself - getvalue() would
+            # copy the whole document a second time
             st.download_button(
                 label="📥 Download PDF",
-                data=pdf_data,
+                data=buffer,
                 file_name=filename,
                 mime="application/pdf",
                 help="Click to download the PDF to your computer"
@@ -2108,30 +2190,24 @@ elif menu == "🔐 Change Password":
                         except Exception as e:
                             st.error(f"Error updating username: {str(e)}")
                     
-                    # Update email if changed
+                    # Email and password go in one update_user payload -
+                    # the API accepts both keys, so no second round-trip
+                    updates = {}
                     if new_email != current_email:
+                        updates["email"] = new_email
+                    if new_pw:
+                        updates["password"] = new_pw
+
+                    if updates:
                         try:
-                            supabase_client.auth.update_user({
-                                "email": new_email
-                            })
-                            st.session_state.user = new_email
-                            st.success("✅ Email updated successfully")
-                        except Exception as email_error:
-                            if "already registered" in str(email_error):
+                            supabase_client.auth.update_user(updates)
+                            if "email" in updates:
+                                st.session_state.user = new_email
+                        except Exception as auth_error:
+                            if "already registered" in str(auth_error):
                                 st.error("This email is already registered to another account")
                             else:
-                                st.error(f"Error updating email: {str(email_error)}")
-                            st.stop()
-                    
-                    # Update password if provided
-                    if new_pw:
-                        try:
-                            supabase_client.auth.update_user({
-                                "password": new_pw
-                            })
-                            st.success("✅ Password updated successfully")
-                        except Exception as pw_error:
-                            st.error(f"Error updating password: {str(pw_error)}")
+                                st.error(f"Error updating credentials: {str(auth_error)}")
                             st.stop()
                     
                     # Summary messages
@@ -2191,8 +2267,14 @@ elif menu == "🚪 Logout":
 
 # Only update loan statuses if user is logged in
 if "auth_session" in st.session_state and st.session_state.auth_session:
-    safe_update_loan_statuses()
-daily_backup()
+    maybe_update_loan_statuses()
+
+# The backup hook only touches the filesystem, but there is no reason to
+# run it on every widget interaction - once an hour is plenty
+_now = time.monotonic()
+if _now - st.session_state.get("_last_backup", 0.0) > 3600:
+    daily_backup()
+    st.session_state["_last_backup"] = _now
 
 
 
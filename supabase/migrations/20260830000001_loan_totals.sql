@@ -0,0 +1,24 @@
+-- Bulk per-loan totals for the current user.
+-- Replaces the two round trips per loan (loan row + unpaid interest rows)
+-- issued by update_loan_statuses with a single GROUP BY query.
+create or replace function loan_totals()
+returns table (
+    loan_id bigint,
+    current_principal numeric,
+    unpaid_interest numeric,
+    total_owed numeric
+)
+language sql
+stable
+as $$
+    select
+        l.id as loan_id,
+        l.current_principal,
+        coalesce(sum(h.interest_amount) filter (where h.is_paid = 0 and h.interest_amount > 0), 0) as unpaid_interest,
+        l.current_principal
+            + coalesce(sum(h.interest_amount) filter (where h.is_paid = 0 and h.interest_amount > 0), 0) as total_owed
+    from loans_new l
+    left join loan_interest_history h on h.loan_id = l.id
+    where l.user_id = auth.uid()
+    group by l.id, l.current_principal;
+$$;
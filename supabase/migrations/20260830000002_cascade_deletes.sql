@@ -0,0 +1,21 @@
+-- Let Postgres cascade child-row deletes so the app can remove a group,
+-- client or loan with a single DELETE instead of one request per child row.
+alter table payments_new
+    drop constraint if exists payments_new_loan_id_fkey,
+    add constraint payments_new_loan_id_fkey
+        foreign key (loan_id) references loans_new (id) on delete cascade;
+
+alter table loan_interest_history
+    drop constraint if exists loan_interest_history_loan_id_fkey,
+    add constraint loan_interest_history_loan_id_fkey
+        foreign key (loan_id) references loans_new (id) on delete cascade;
+
+alter table loans_new
+    drop constraint if exists loans_new_client_id_fkey,
+    add constraint loans_new_client_id_fkey
+        foreign key (client_id) references clients (id) on delete cascade;
+
+alter table clients
+    drop constraint if exists clients_group_id_fkey,
+    add constraint clients_group_id_fkey
+        foreign key (group_id) references groups (id) on delete cascade;
@@ -0,0 +1,4 @@
+-- One row per (user, setting) so set_setting can upsert atomically
+-- instead of doing a SELECT followed by INSERT-or-UPDATE.
+alter table settings
+    add constraint settings_user_id_key_unique unique (user_id, key);
@@ -0,0 +1,85 @@
+-- Apply a payment to a loan atomically: unpaid interest first (oldest
+-- due date first), then principal, then record the payment row and the
+-- new loan status. Replaces the per-entry UPDATE round trips issued by
+-- process_payment from Python and closes the window where a failure
+-- mid-sequence left interest half-marked as paid.
+create or replace function apply_payment(p_loan_id bigint, p_amount numeric, p_date date)
+returns json
+language plpgsql
+as $$
+declare
+    v_loan loans_new%rowtype;
+    v_entry record;
+    v_remaining numeric := round(p_amount, 2);
+    v_applied_interest numeric := 0;
+    v_applied_principal numeric := 0;
+    v_new_principal numeric;
+    v_unpaid numeric;
+    v_status text;
+begin
+    select * into v_loan
+    from loans_new
+    where id = p_loan_id and user_id = auth.uid()
+    for update;
+
+    if not found then
+        raise exception 'Loan not found or access denied';
+    end if;
+
+    -- Pay interest first
+    for v_entry in
+        select id, interest_amount
+        from loan_interest_history
+        where loan_id = p_loan_id
+          and is_paid = 0
+          and interest_amount > 0
+        order by due_date
+        for update
+    loop
+        exit when v_remaining <= 0;
+
+        if v_remaining >= v_entry.interest_amount then
+            update loan_interest_history set is_paid = 1 where id = v_entry.id;
+            v_applied_interest := v_applied_interest + v_entry.interest_amount;
+            v_remaining := round(v_remaining - v_entry.interest_amount, 2);
+        else
+            update loan_interest_history
+               set interest_amount = round(interest_amount - v_remaining, 2)
+             where id = v_entry.id;
+            v_applied_interest := v_applied_interest + v_remaining;
+            v_remaining := 0;
+        end if;
+    end loop;
+
+    -- Whatever is left goes to principal
+    v_new_principal := v_loan.current_principal;
+    if v_remaining > 0 then
+        v_applied_principal := v_remaining;
+        v_new_principal := greatest(round(v_loan.current_principal - v_remaining, 2), 0);
+    end if;
+
+    insert into payments_new
+        (loan_id, amount, payment_date, applied_to_interest,
+         applied_to_principal, remaining_amount, user_id)
+    values
+        (p_loan_id, p_amount, p_date, v_applied_interest,
+         v_applied_principal, v_remaining, auth.uid());
+
+    select coalesce(sum(interest_amount), 0) into v_unpaid
+    from loan_interest_history
+    where loan_id = p_loan_id and is_paid = 0 and interest_amount > 0;
+
+    v_status := case when v_new_principal + v_unpaid <= 0 then 'Paid' else 'Active' end;
+
+    update loans_new
+       set current_principal = v_new_principal,
+           status = v_status
+     where id = p_loan_id;
+
+    return json_build_object(
+        'status', v_status,
+        'applied_to_interest', v_applied_interest,
+        'applied_to_principal', v_applied_principal
+    );
+end;
+$$;
@@ -0,0 +1,13 @@
+-- Sum unpaid interest per loan in Postgres instead of shipping every
+-- interest-history row to the client just to add them up.
+-- security_invoker keeps the caller's RLS policies in force.
+create view v_unpaid_interest
+with (security_invoker = true)
+as
+select
+    loan_id,
+    user_id,
+    sum(interest_amount) filter (where interest_amount > 0) as total_unpaid
+from loan_interest_history
+where is_paid = 0
+group by loan_id, user_id;
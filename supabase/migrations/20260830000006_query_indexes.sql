@@ -0,0 +1,17 @@
+-- Btree indexes matching the app's hot filters so PostgREST lookups
+-- stay index scans as the tables grow:
+--   * unpaid-interest sums filter on (loan_id, is_paid)
+--   * the overdue existence probe filters on (loan_id, due_date)
+--   * payment sums filter on loan_id
+--   * status passes filter on (user_id, status)
+--   * can_delete_client counts loans by client_id
+create index if not exists idx_interest_loan_is_paid
+    on loan_interest_history (loan_id, is_paid);
+create index if not exists idx_interest_loan_due_date
+    on loan_interest_history (loan_id, due_date);
+create index if not exists idx_payments_loan
+    on payments_new (loan_id);
+create index if not exists idx_loans_user_status
+    on loans_new (user_id, status);
+create index if not exists idx_loans_client
+    on loans_new (client_id);
@@ -0,0 +1,25 @@
+-- Denormalized loans view joining clients/groups and folding in the
+-- unpaid-interest and paid sums, so the app builds its loans frame from
+-- one PostgREST round-trip instead of three.
+-- security_invoker keeps the caller's RLS policies in force.
+create view loans_dashboard
+with (security_invoker = true)
+as
+select
+    l.id,
+    l.user_id,
+    l.loan_date,
+    l.current_due_date as due_date,
+    l.current_principal as principal,
+    l.status,
+    c.name as client,
+    coalesce(g.name, '') as group_name,
+    coalesce((select sum(h.interest_amount)
+                from loan_interest_history h
+               where h.loan_id = l.id and h.is_paid = 0), 0) as interest,
+    coalesce((select sum(p.amount)
+                from payments_new p
+               where p.loan_id = l.id), 0) as paid
+from loans_new l
+join clients c on c.id = l.client_id
+left join groups g on g.id = c.group_id;
@@ -0,0 +1,35 @@
+-- Create a loan and its initial interest entry in one transaction.
+-- Replaces two sequential inserts from Python, which cost two
+-- round-trips and could orphan the loan row if the interest insert
+-- failed. The interest amount is computed by the app so INTEREST_RATE
+-- stays defined in one place.
+create or replace function create_loan(
+    p_client_id bigint,
+    p_loan_date date,
+    p_due_date date,
+    p_principal numeric,
+    p_interest numeric
+) returns loans_new
+language plpgsql
+as $$
+declare
+    v_loan loans_new%rowtype;
+begin
+    insert into loans_new
+        (client_id, loan_date, original_due_date, current_due_date,
+         original_principal, current_principal, status, user_id)
+    values
+        (p_client_id, p_loan_date, p_due_date, p_due_date,
+         p_principal, p_principal, 'Partial', auth.uid())
+    returning * into v_loan;
+
+    insert into loan_interest_history
+        (loan_id, due_date, interest_amount, principal_at_time,
+         added_date, is_paid, user_id)
+    values
+        (v_loan.id, p_due_date, p_interest, p_principal,
+         current_date, 0, auth.uid());
+
+    return v_loan;
+end;
+$$;